@@ -3,8 +3,6 @@
 import argparse
 import logging
 import sys
-import time
-from rpi_rf import RFDevice
 
 def main():
     parser = argparse.ArgumentParser(description='Sends a decimal code via a 433/315MHz GPIO device')
@@ -18,6 +16,9 @@ def main():
                         help="Protocol (Default: 1)")
     args = parser.parse_args()
 
+    # Imported after argument parsing so --help and usage errors stay fast
+    from rpi_rf import RFDevice
+
     rfdevice = RFDevice(args.gpio)
     rfdevice.enable_tx()
     
@@ -8,11 +8,13 @@ import redis
 import json
 import logging
 import os
+import socket
 import sys
 import time
 from config_manager import (
     get_switches, get_switch, add_switch, update_switch, delete_switch,
-    get_settings, update_settings, sync_to_redis, get_next_id
+    get_settings, update_settings, sync_to_redis, get_next_id,
+    json_dumps, json_loads, batch_updates
 )
 
 # Configuration
@@ -20,12 +22,90 @@ REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
 REDIS_PORT = int(os.getenv('REDIS_PORT', 6379))
 CONFIG_COMMANDS_CHANNEL = 'config_commands'
 CONFIG_RESPONSES_CHANNEL = 'config_responses'
+MAX_BATCH_SIZE = 100  # Most commands to apply with a single config write
+RECONNECT_BASE_DELAY = 0.5  # Seconds before the first reconnect attempt
+RECONNECT_MAX_DELAY = 30
 
+# Detect dead connections in ~45s instead of waiting on the OS default (hours)
+KEEPALIVE_OPTIONS = {
+    option: value
+    for option, value in (
+        (getattr(socket, 'TCP_KEEPIDLE', None), 30),
+        (getattr(socket, 'TCP_KEEPINTVL', None), 5),
+        (getattr(socket, 'TCP_KEEPCNT', None), 3),
+    )
+    if option is not None
+}
 
-def handle_command(r, message):
-    """Process a config command and publish response"""
+
+# --- Command handlers ---
+# Each takes the command payload and returns the response data.
+# A ValueError becomes an unsuccessful response with its message as the error.
+
+def _get_switch(payload):
+    switch_id = payload.get('id')
+    switch = get_switch(switch_id)
+    if not switch:
+        raise ValueError(f"Switch {switch_id} not found")
+    return switch
+
+
+def _add_switch(payload):
+    name = payload.get('name')
+    on_code = payload.get('on_code')
+    off_code = payload.get('off_code')
+    switch_id = payload.get('id')  # Optional
+    
+    if not all([name, on_code, off_code]):
+        raise ValueError("Missing required fields: name, on_code, off_code")
+    return add_switch(name, on_code, off_code, switch_id)
+
+
+def _update_switch(payload):
+    switch_id = payload.get('id')
+    if not switch_id:
+        raise ValueError("Missing switch ID")
+    return update_switch(
+        switch_id,
+        name=payload.get('name'),
+        on_code=payload.get('on_code'),
+        off_code=payload.get('off_code')
+    )
+
+
+def _delete_switch(payload):
+    switch_id = payload.get('id')
+    if not switch_id:
+        raise ValueError("Missing switch ID")
+    delete_switch(switch_id)
+    return {'deleted': switch_id}
+
+
+def _sync(payload):
+    sync_to_redis()
+    return {'synced': True}
+
+
+COMMAND_HANDLERS = {
+    'get_switches': lambda payload: get_switches(),
+    'get_switch': _get_switch,
+    'add_switch': _add_switch,
+    'update_switch': _update_switch,
+    'delete_switch': _delete_switch,
+    'get_settings': lambda payload: get_settings(),
+    'update_settings': update_settings,
+    'get_next_id': lambda payload: {'next_id': get_next_id()},
+    'sync': _sync,
+}
+
+# Actions whose changes are only saved when the batch they arrive in commits
+MUTATING_ACTIONS = {'add_switch', 'update_switch', 'delete_switch', 'update_settings'}
+
+
+def process_command(message):
+    """Process a config command and return its response (None if undecodable)"""
     try:
-        data = json.loads(message)
+        data = json_loads(message)
         action = data.get('action')
         request_id = data.get('request_id', 'unknown')
         payload = data.get('data', {})
@@ -41,71 +121,12 @@ def handle_command(r, message):
         }
         
         try:
-            if action == 'get_switches':
-                response['data'] = get_switches()
-                
-            elif action == 'get_switch':
-                switch_id = payload.get('id')
-                switch = get_switch(switch_id)
-                if switch:
-                    response['data'] = switch
-                else:
-                    response['success'] = False
-                    response['error'] = f"Switch {switch_id} not found"
-                    
-            elif action == 'add_switch':
-                name = payload.get('name')
-                on_code = payload.get('on_code')
-                off_code = payload.get('off_code')
-                switch_id = payload.get('id')  # Optional
-                
-                if not all([name, on_code, off_code]):
-                    response['success'] = False
-                    response['error'] = "Missing required fields: name, on_code, off_code"
-                else:
-                    new_switch = add_switch(name, on_code, off_code, switch_id)
-                    response['data'] = new_switch
-                    
-            elif action == 'update_switch':
-                switch_id = payload.get('id')
-                if not switch_id:
-                    response['success'] = False
-                    response['error'] = "Missing switch ID"
-                else:
-                    updated = update_switch(
-                        switch_id,
-                        name=payload.get('name'),
-                        on_code=payload.get('on_code'),
-                        off_code=payload.get('off_code')
-                    )
-                    response['data'] = updated
-                    
-            elif action == 'delete_switch':
-                switch_id = payload.get('id')
-                if not switch_id:
-                    response['success'] = False
-                    response['error'] = "Missing switch ID"
-                else:
-                    delete_switch(switch_id)
-                    response['data'] = {'deleted': switch_id}
-                    
-            elif action == 'get_settings':
-                response['data'] = get_settings()
-                
-            elif action == 'update_settings':
-                updated = update_settings(payload)
-                response['data'] = updated
-                
-            elif action == 'get_next_id':
-                response['data'] = {'next_id': get_next_id()}
-                
-            elif action == 'sync':
-                sync_to_redis()
-                response['data'] = {'synced': True}
-                
-            else:
+            handler = COMMAND_HANDLERS.get(action)
+            if handler is None:
                 response['success'] = False
                 response['error'] = f"Unknown action: {action}"
+            else:
+                response['data'] = handler(payload)
                 
         except ValueError as ve:
             response['success'] = False
@@ -115,14 +136,57 @@ def handle_command(r, message):
             response['error'] = f"Internal error: {str(e)}"
             logging.exception(f"Error processing command {action}")
         
-        # Publish response
-        r.publish(CONFIG_RESPONSES_CHANNEL, json.dumps(response))
-        logging.info(f"Published response for {action}: success={response['success']}")
+        return response
         
     except json.JSONDecodeError:
         logging.error(f"Failed to decode JSON: {message}")
     except Exception as e:
         logging.exception(f"Unexpected error handling command: {e}")
+    return None
+
+
+def handle_commands_batch(r, messages):
+    """
+    Process a burst of config commands and publish their responses.
+    
+    All changes in the burst are saved and synced to Redis once, before any
+    response is published, so clients never see a response ahead of the data.
+    If saving fails, every change in the burst is answered as failed.
+    """
+    responses = []
+    try:
+        with batch_updates():
+            for message in messages:
+                response = process_command(message)
+                if response is not None:
+                    # Serialize before the next command runs: response data can be
+                    # the cached config objects that later commands modify
+                    responses.append((response, json_dumps(response)))
+    except Exception as e:
+        logging.exception("Failed to save config batch")
+        for i, (response, body) in enumerate(responses):
+            if response['action'] in MUTATING_ACTIONS and response['success']:
+                response['success'] = False
+                response['data'] = None
+                response['error'] = f"Internal error: {str(e)}"
+                responses[i] = (response, json_dumps(response))
+    
+    # Publish all responses in one round-trip
+    with r.pipeline(transaction=False) as pipe:
+        for response, body in responses:
+            pipe.publish(CONFIG_RESPONSES_CHANNEL, body)
+            logging.info(f"Publishing response for {response['action']}: success={response['success']}")
+        pipe.execute()
+
+
+def handle_command(r, message):
+    """Process a config command and publish response"""
+    handle_commands_batch(r, [message])
+
+
+def reconnect_delay(failures):
+    """Exponential backoff: 0.5s, 1s, 2s, ... capped at RECONNECT_MAX_DELAY"""
+    return min(RECONNECT_MAX_DELAY, RECONNECT_BASE_DELAY * (2 ** failures))
 
 
 def main():
@@ -137,28 +201,50 @@ def main():
     logging.info("Performing initial config sync to Redis...")
     sync_to_redis()
     
+    failures = 0
     while True:
         try:
-            r = redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
+            r = redis.Redis(
+                host=REDIS_HOST, port=REDIS_PORT, decode_responses=True,
+                socket_keepalive=True,
+                socket_keepalive_options=KEEPALIVE_OPTIONS,
+                health_check_interval=30
+            )
             r.ping()
             logging.info("Connected to Redis.")
+            failures = 0
             
             pubsub = r.pubsub()
             pubsub.subscribe(CONFIG_COMMANDS_CHANNEL)
             
             logging.info(f"Listening for config commands on channel: '{CONFIG_COMMANDS_CHANNEL}'")
             
-            for message in pubsub.listen():
-                if message['type'] == 'message':
-                    handle_command(r, message['data'])
+            while True:
+                # Block for the first message, then drain whatever else is
+                # already queued so a burst is applied with one config write
+                message = pubsub.get_message(timeout=1.0)
+                batch = []
+                while message:
+                    if message['type'] == 'message':
+                        batch.append(message['data'])
+                        if len(batch) >= MAX_BATCH_SIZE:
+                            break
+                    message = pubsub.get_message()
+                
+                if batch:
+                    handle_commands_batch(r, batch)
                     
         except redis.ConnectionError as e:
+            delay = reconnect_delay(failures)
+            failures += 1
             logging.error(f"Redis connection error: {e}")
-            logging.info("Retrying in 5 seconds...")
-            time.sleep(5)
+            logging.info(f"Retrying in {delay:g} seconds...")
+            time.sleep(delay)
         except Exception as e:
+            delay = reconnect_delay(failures)
+            failures += 1
             logging.exception(f"Unexpected error: {e}")
-            time.sleep(5)
+            time.sleep(delay)
 
 
 if __name__ == '__main__':
@@ -8,7 +8,14 @@ import json
 import os
 import logging
 import threading
-import redis
+import time
+from contextlib import contextmanager
+
+# orjson is optional - it is several times faster than the stdlib json module
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), 'config.json')
 REDIS_HOST = os.getenv('REDIS_HOST', 'localhost')
@@ -17,39 +24,132 @@ REDIS_CONFIG_KEY = 'config:switches'
 REDIS_SETTINGS_KEY = 'config:settings'
 
 _lock = threading.Lock()
+_write_lock = threading.Lock()
+# Saves are numbered under _lock as they are serialized; _write_config_file
+# skips one older than what is already on disk (guarded by _write_lock)
+_save_seq = 0
+_written_seq = 0
 _config_cache = None
+# (path, mtime_ns, size, inode) of the file _config_cache was read from
+_config_stat = None
+# Files modified more recently than this are re-read, since mtime granularity
+# can hide a second write within the same clock tick
+RACY_WINDOW_NS = 2_000_000_000
+
+# Pending config while inside batch_updates(), None otherwise
+_batch_config = None
+_batching = False
+
+
+def json_dumps(obj, indent=False):
+    """Serialize to JSON bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(obj, indent=2 if indent else None).encode()
+
+
+def json_loads(data):
+    """Parse JSON from str or bytes, using orjson when available"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
 
 
 def get_redis_client():
     """Get Redis client connection"""
+    # Imported here so CLI-only config reads don't pay for loading redis
+    import redis
     return redis.Redis(host=REDIS_HOST, port=REDIS_PORT, decode_responses=True)
 
 
+def _stat_key():
+    """Identify the current contents of CONFIG_FILE without reading it"""
+    st = os.stat(CONFIG_FILE)
+    return (CONFIG_FILE, st.st_mtime_ns, st.st_size, st.st_ino)
+
+
 def load_config():
-    """Load configuration from file"""
-    global _config_cache
+    """Load configuration from file (cached until the file changes)"""
+    global _config_cache, _config_stat
+    if _batch_config is not None:
+        return _batch_config
     with _lock:
         try:
-            with open(CONFIG_FILE, 'r') as f:
-                _config_cache = json.load(f)
+            key = _stat_key()
+            if (_config_cache is not None and key == _config_stat
+                    and time.time_ns() - key[1] > RACY_WINDOW_NS):
+                return _config_cache
+            
+            with open(CONFIG_FILE, 'rb') as f:
+                _config_cache = json_loads(f.read())
+            _config_stat = key
             return _config_cache
         except FileNotFoundError:
             logging.warning(f"Config file not found, creating default: {CONFIG_FILE}")
             _config_cache = {"switches": [], "settings": get_default_settings()}
-            save_config(_config_cache)
+            _write_config_file(json_dumps(_config_cache, indent=True), _next_save_seq())
+            _config_stat = None
             return _config_cache
         except json.JSONDecodeError as e:
             logging.error(f"Invalid JSON in config file: {e}")
             raise
 
 
+def _next_save_seq():
+    """Number a save being serialized (caller holds _lock)"""
+    global _save_seq
+    _save_seq += 1
+    return _save_seq
+
+
+def _write_config_file(data, seq):
+    """
+    Durably write serialized config to CONFIG_FILE.
+    
+    Writes to a temp file, fsyncs it, and swaps it in with os.replace so a
+    power loss never leaves a half-written config. When the config file is
+    a Docker bind mount, os.replace fails (EBUSY); in that case the file is
+    rewritten in place and fsynced instead.
+    
+    `seq` orders concurrent saves: a save that a newer one has already
+    written is skipped, so the file never goes back to older data.
+    """
+    global _written_seq
+    tmp_file = CONFIG_FILE + '.tmp'
+    with _write_lock:
+        if seq <= _written_seq:
+            logging.debug(f"Skipping config write {seq}, superseded by {_written_seq}")
+            return
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, CONFIG_FILE)
+        except OSError as e:
+            logging.debug(f"Atomic config replace failed ({e}), writing in place")
+            try:
+                os.unlink(tmp_file)
+            except OSError:
+                pass
+            
+            with open(CONFIG_FILE, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        _written_seq = seq
+
+
 def save_config(config):
     """Save configuration to file"""
-    global _config_cache
+    global _config_cache, _config_stat
     with _lock:
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f, indent=2)
+        data = json_dumps(config, indent=True)
         _config_cache = config
+        _config_stat = None
+        seq = _next_save_seq()
+    # File I/O happens outside _lock so readers are not blocked by fsync
+    _write_config_file(data, seq)
     logging.info("Config saved to file")
 
 
@@ -64,13 +164,17 @@ def get_default_settings():
     }
 
 
-def sync_to_redis():
-    """Sync current config to Redis for backend reads"""
+def sync_to_redis(config=None):
+    """Sync config to Redis for backend reads (loads from file if not given)"""
     try:
-        config = load_config()
+        if config is None:
+            config = load_config()
         r = get_redis_client()
-        r.set(REDIS_CONFIG_KEY, json.dumps(config.get('switches', [])))
-        r.set(REDIS_SETTINGS_KEY, json.dumps(config.get('settings', {})))
+        # Send both keys in one round-trip
+        with r.pipeline(transaction=False) as pipe:
+            pipe.set(REDIS_CONFIG_KEY, json_dumps(config.get('switches', [])))
+            pipe.set(REDIS_SETTINGS_KEY, json_dumps(config.get('settings', {})))
+            pipe.execute()
         logging.info("Config synced to Redis")
         return True
     except Exception as e:
@@ -78,6 +182,43 @@ def sync_to_redis():
         return False
 
 
+def _persist(config):
+    """Save an already-modified config and sync it to Redis"""
+    global _batch_config
+    if _batching:
+        _batch_config = config
+        return
+    save_config(config)
+    sync_to_redis(config)
+
+
+@contextmanager
+def batch_updates():
+    """
+    Defer saving and syncing until the block exits.
+    
+    Changes made inside the block are visible to later calls in the same
+    block, then written to file and Redis once. Used by the config listener
+    to apply a burst of commands with a single write.
+    """
+    global _batch_config, _batching
+    if _batching:
+        yield
+        return
+    
+    _batching = True
+    try:
+        yield
+        config = _batch_config
+    finally:
+        _batching = False
+        _batch_config = None
+    
+    if config is not None:
+        save_config(config)
+        sync_to_redis(config)
+
+
 def get_switches():
     """Get all switches"""
     config = load_config()
@@ -93,14 +234,18 @@ def get_switch(switch_id):
     return None
 
 
-def get_next_id():
-    """Get the next available switch ID"""
-    switches = get_switches()
+def _next_id(switches):
+    """Get the next available ID for a list of switches"""
     if not switches:
         return 1
     return max(s['id'] for s in switches) + 1
 
 
+def get_next_id():
+    """Get the next available switch ID"""
+    return _next_id(get_switches())
+
+
 def add_switch(name, on_code, off_code, switch_id=None):
     """Add a new switch"""
     config = load_config()
@@ -108,7 +253,7 @@ def add_switch(name, on_code, off_code, switch_id=None):
     
     # Auto-generate ID if not provided
     if switch_id is None:
-        switch_id = get_next_id()
+        switch_id = _next_id(switches)
     
     # Check for duplicate ID
     if any(s['id'] == switch_id for s in switches):
@@ -123,8 +268,7 @@ def add_switch(name, on_code, off_code, switch_id=None):
     
     switches.append(new_switch)
     config['switches'] = switches
-    save_config(config)
-    sync_to_redis()
+    _persist(config)
     
     logging.info(f"Added switch: {new_switch}")
     return new_switch
@@ -145,8 +289,7 @@ def update_switch(switch_id, name=None, on_code=None, off_code=None):
                 switch['off_code'] = off_code
             
             config['switches'] = switches
-            save_config(config)
-            sync_to_redis()
+            _persist(config)
             
             logging.info(f"Updated switch {switch_id}: {switch}")
             return switch
@@ -166,8 +309,7 @@ def delete_switch(switch_id):
         raise ValueError(f"Switch with ID {switch_id} not found")
     
     config['switches'] = switches
-    save_config(config)
-    sync_to_redis()
+    _persist(config)
     
     logging.info(f"Deleted switch {switch_id}")
     return True
@@ -183,8 +325,7 @@ def update_settings(settings):
     """Update settings"""
     config = load_config()
     config['settings'] = {**config.get('settings', {}), **settings}
-    save_config(config)
-    sync_to_redis()
+    _persist(config)
     return config['settings']
 
 
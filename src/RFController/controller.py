@@ -1,10 +1,11 @@
 #!/usr/bin/env python3
 
 import argparse
+import atexit
 import logging
 import time
-from rpi_rf import RFDevice
 from config_manager import get_outlets_dict, get_settings, load_config
+from wave_tx import WaveTransmitter
 
 # Load configuration from config.json
 def get_config():
@@ -20,30 +21,122 @@ def get_outlets():
     """Load outlets from config"""
     return get_outlets_dict()
 
+# Imported on first send: rpi_rf pulls in RPi.GPIO, which probes the
+# hardware and is slow to import
+RFDevice = None
+
+# TX devices keyed by GPIO pin, kept enabled between sends
+_rfdevice_cache = {}
+
+# How often a pin stuck on rpi_rf checks whether the pigpio daemon is back
+PIGPIO_RETRY_INTERVAL = 60
+_pigpio_retry_at = 0
+
+def _get_device(gpio):
+    """
+    Get an enabled TX device for a GPIO pin, creating it on first use.
+    
+    Prefers a pigpio waveform transmitter (DMA-timed pulses) and falls back
+    to rpi_rf, which times pulses with time.sleep().
+    """
+    global RFDevice, _pigpio_retry_at
+    rfdevice = _rfdevice_cache.get(gpio)
+    if rfdevice is not None and not isinstance(rfdevice, WaveTransmitter):
+        # Switch to pigpio if its daemon has started since the fallback
+        now = time.monotonic()
+        if now >= _pigpio_retry_at:
+            _pigpio_retry_at = now + PIGPIO_RETRY_INTERVAL
+            transmitter = WaveTransmitter.connect(gpio)
+            if transmitter is not None:
+                _release_device(rfdevice)
+                transmitter.setup_pin()  # rpi_rf's cleanup reset the pin to input
+                rfdevice = _rfdevice_cache[gpio] = transmitter
+    if rfdevice is None:
+        rfdevice = WaveTransmitter.connect(gpio)
+        if rfdevice is None:
+            if RFDevice is None:
+                from rpi_rf import RFDevice
+            rfdevice = RFDevice(gpio)
+            rfdevice.enable_tx()
+            _pigpio_retry_at = time.monotonic() + PIGPIO_RETRY_INTERVAL
+        _rfdevice_cache[gpio] = rfdevice
+    return rfdevice
+
+def _release_device(rfdevice):
+    """Clean up a TX device, ignoring errors from one that already failed"""
+    try:
+        rfdevice.cleanup()
+    except Exception as e:
+        logging.debug(f"TX device cleanup failed: {e}")
+
+def _transmit(gpio, send):
+    """
+    Call send(device) with the pin's TX device.
+    
+    A cached device can go stale (e.g. pigpiod restarted and took its socket
+    and waveforms with it), so on failure the device is dropped and the send
+    is retried once on a fresh one.
+    """
+    try:
+        return send(_get_device(gpio))
+    except Exception as e:
+        logging.warning(f"TX device on GPIO {gpio} failed ({e}), reconnecting")
+        rfdevice = _rfdevice_cache.pop(gpio, None)
+        if rfdevice is not None:
+            _release_device(rfdevice)
+        return send(_get_device(gpio))
+
+def _cleanup_devices():
+    """Release all cached TX devices"""
+    for rfdevice in _rfdevice_cache.values():
+        _release_device(rfdevice)
+    _rfdevice_cache.clear()
+
+atexit.register(_cleanup_devices)
+
 def send_code(code, gpio=None, pulselength=None, protocol=None):
     config = get_config()
     gpio = gpio or config['gpio_pin']
     pulselength = pulselength or config['pulse_length']
     protocol = protocol or config['protocol']
     
-    rfdevice = RFDevice(gpio)
-    rfdevice.enable_tx()
-    rfdevice.tx_code(code, protocol, pulselength)
-    rfdevice.cleanup()
+    _transmit(gpio, lambda rfdevice: rfdevice.tx_code(code, protocol, pulselength))
     logging.info(f"Sent code: {code}")
 
-def control_outlet(outlet_id, state):
-    outlets = get_outlets()
+def send_codes(codes, gpio=None, pulselength=None, protocol=None, repeats=1):
+    """Send several codes back-to-back on one TX device (scenes, "all off")"""
+    config = get_config()
+    gpio = gpio or config['gpio_pin']
+    pulselength = pulselength or config['pulse_length']
+    protocol = protocol or config['protocol']
     
-    if outlet_id not in outlets:
+    remaining = list(codes)
+    
+    def send(rfdevice):
+        # Resumes after the last fully sent code if retried on a new device
+        tx_code = rfdevice.tx_code
+        while remaining:
+            code = remaining[0]
+            for _ in range(repeats):
+                tx_code(code, protocol, pulselength)
+            remaining.pop(0)
+    
+    sent = len(remaining)
+    _transmit(gpio, send)
+    logging.info(f"Sent {sent} codes")
+
+def control_outlet(outlet_id, state):
+    codes = get_outlets().get(outlet_id)
+    if codes is None:
         logging.error(f"Invalid outlet ID: {outlet_id}")
         return
 
-    if state.lower() not in ['on', 'off']:
+    state = state.lower()
+    code = codes.get(state)
+    if code is None:
         logging.error("State must be 'on' or 'off'")
         return
 
-    code = outlets[outlet_id][state.lower()]
     logging.info(f"Turning Outlet {outlet_id} {state.upper()}...")
     send_code(code)
 
@@ -10,17 +10,202 @@ Based on successful calibration:
 - Sync gap: ~5700µs (detected as >4000µs)
 """
 
+import ctypes
+import ctypes.util
+import importlib.util
+import os
 import time
 import logging
+from array import array
+from collections import Counter, deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from queue import Empty, SimpleQueue
 
-# Import GPIO - try rpi-lgpio first (for newer kernels), then RPi.GPIO
+# RPi.GPIO (or rpi-lgpio, which provides the same module on newer kernels)
+# is imported on first setup(), so the decoding logic can be used and tested
+# on machines without GPIO access
+GPIO = None
+
+
+def gpio_available():
+    """Return True if RPi.GPIO can be imported, without importing it"""
+    try:
+        return importlib.util.find_spec("RPi.GPIO") is not None
+    except ImportError:
+        return False
+
+
+def _import_gpio():
+    """Import RPi.GPIO into the module namespace on first use"""
+    global GPIO
+    if GPIO is None:
+        try:
+            import RPi.GPIO as gpio_module
+        except ImportError:
+            raise ImportError("RPi.GPIO not available - custom RF decoder requires GPIO access")
+        GPIO = gpio_module
+    return GPIO
+
+# pigpio is optional - when its daemon is running, edges are timestamped by
+# the daemon instead of by a Python polling loop
 try:
-    import RPi.GPIO as GPIO
+    import pigpio
 except ImportError:
-    raise ImportError("RPi.GPIO not available - custom RF decoder requires GPIO access")
+    pigpio = None
 
 logger = logging.getLogger(__name__)
 
+# SCHED_FIFO priority for the GPIO polling loop (1-99)
+CAPTURE_RT_PRIORITY = 50
+
+# mlockall() flags from <sys/mman.h>
+_MCL_CURRENT = 1
+_MCL_FUTURE = 2
+
+# Pulse classification flags (a pulse may match both if the averages are close)
+_SHORT = 1
+_LONG = 2
+
+# Pair lookup values: the low bit is the decoded bit, the high bit marks a
+# valid pair (0 means the pair is not a bit and decoding resyncs)
+_BIT_0 = 0b10
+_BIT_1 = 0b11
+
+
+def _build_pair_lut():
+    """Map (first << 2) | second pulse class to the bit it encodes, or 0"""
+    lut = bytearray(16)
+    for k1 in range(4):
+        for k2 in range(4):
+            if k1 & _SHORT and k2 & _LONG:
+                lut[(k1 << 2) | k2] = _BIT_0
+            elif k1 & _LONG and k2 & _SHORT:
+                lut[(k1 << 2) | k2] = _BIT_1
+    return bytes(lut)
+
+
+_PAIR_LUT = _build_pair_lut()
+
+
+def _decode_bits(kinds):
+    """
+    Decode classified pulses into an integer, returning (value, bit_count).
+    
+    A short/long pair is bit 0 and long/short is bit 1. Any other pair is
+    treated as a glitch and decoding resyncs one pulse later.
+    """
+    lut = _PAIR_LUT
+    value = 0
+    nbits = 0
+    i = 0
+    last = len(kinds) - 1
+    
+    while i < last:
+        bit = lut[(kinds[i] << 2) | kinds[i + 1]]
+        if bit:
+            value = (value << 1) | (bit & 1)
+            nbits += 1
+            i += 2
+        else:
+            i += 1
+    
+    return value, nbits
+
+
+@dataclass(frozen=True)
+class ProtocolParams:
+    """Pulse widths (µs) and tolerance that a remote's segments decode with"""
+    short_us: float
+    long_us: float
+    tol: float
+    
+    @property
+    def short_bounds(self):
+        return self.short_us * (1 - self.tol), self.short_us * (1 + self.tol)
+    
+    @property
+    def long_bounds(self):
+        return self.long_us * (1 - self.tol), self.long_us * (1 + self.tol)
+
+
+def _libc():
+    """Load the C library, for the mlockall() family"""
+    return ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+
+
+def _lock_memory():
+    """
+    Lock the process's pages in RAM so page faults can't stall a capture.
+    
+    Needs CAP_IPC_LOCK or a large enough RLIMIT_MEMLOCK; failures are ignored.
+    Returns True if the lock was taken, to be released with _unlock_memory().
+    """
+    try:
+        libc = _libc()
+        if libc.mlockall(_MCL_CURRENT | _MCL_FUTURE) != 0:
+            logger.debug(f"mlockall failed: {os.strerror(ctypes.get_errno())}")
+            return False
+        return True
+    except (AttributeError, OSError) as e:
+        logger.debug(f"mlockall not available: {e}")
+        return False
+
+
+def _unlock_memory():
+    """Undo _lock_memory(), so later allocations don't count against RLIMIT_MEMLOCK"""
+    try:
+        _libc().munlockall()
+    except (AttributeError, OSError) as e:
+        logger.debug(f"munlockall not available: {e}")
+
+
+@contextmanager
+def _realtime_priority(priority=CAPTURE_RT_PRIORITY):
+    """
+    Run the block pinned to one CPU under SCHED_FIFO, where permitted.
+    
+    Keeps the scheduler from preempting or migrating the polling loop in the
+    middle of a pulse. The last CPU is used since it sees the fewest system
+    interrupts (and can be reserved with isolcpus). Both settings need
+    CAP_SYS_NICE or root, so failures are ignored and the previous affinity
+    and policy are restored afterwards. Memory is locked only for the block.
+    A `priority` of None disables all of it.
+    """
+    if priority is None:
+        yield
+        return
+    
+    memory_locked = _lock_memory()
+    saved_affinity = saved_policy = None
+    try:
+        saved_affinity = os.sched_getaffinity(0)
+        os.sched_setaffinity(0, {max(saved_affinity)})
+    except (AttributeError, OSError):
+        saved_affinity = None
+    try:
+        saved_policy = (os.sched_getscheduler(0), os.sched_getparam(0))
+        os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+    except (AttributeError, OSError) as e:
+        logger.debug(f"Real-time scheduling not available: {e}")
+        saved_policy = None
+    
+    try:
+        yield
+    finally:
+        if saved_policy is not None:
+            try:
+                os.sched_setscheduler(0, *saved_policy)
+            except OSError:
+                pass
+        if saved_affinity is not None:
+            try:
+                os.sched_setaffinity(0, saved_affinity)
+            except OSError:
+                pass
+        if memory_locked:
+            _unlock_memory()
+
 
 class RFDecodeError(Exception):
     """
@@ -58,132 +243,405 @@ class CustomRFDecoder:
     The key insight: PT2262/EV1527 protocols have a long sync gap (~5700µs)
     between code transmissions. By detecting these gaps, we can isolate
     individual code segments and decode them accurately.
+    
+    Edges are captured with one of these backends:
+    - "auto": pigpio when its daemon is running, otherwise RPi.GPIO polling
+    - "pigpio": pigpio hardware-timestamped edges; fails if the daemon is down
+    - "poll": RPi.GPIO polling, even if pigpio is available
+    - "events": RPi.GPIO edge callbacks; uses little CPU but timestamps are
+      taken in Python, so they jitter more than polling
+    
+    While polling, the capture thread can run under SCHED_FIFO at
+    `rt_priority`, e.g. CAPTURE_RT_PRIORITY (the default None keeps normal
+    scheduling).
     """
     
-    def __init__(self, gpio_pin, tolerance=0.4):
+    BACKENDS = ("auto", "pigpio", "poll", "events")
+    
+    def __init__(self, gpio_pin, tolerance=0.4, backend="auto", rt_priority=None):
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown capture backend: {backend}")
         self.gpio_pin = gpio_pin
         self.tolerance = tolerance
+        self.backend = backend
+        self.rt_priority = rt_priority
         self.sync_gap_threshold = 4000  # µs - gaps longer than this mark segment boundaries
         self._setup_done = False
+        self._pi = None
         
     def setup(self):
         """Initialize GPIO"""
         if not self._setup_done:
-            GPIO.setmode(GPIO.BCM)
-            GPIO.setup(self.gpio_pin, GPIO.IN)
+            if self.backend == "pigpio" and pigpio is None:
+                raise ImportError("pigpio not available - install it or use another capture backend")
+            if self.backend in ("auto", "pigpio") and pigpio is not None:
+                pi = pigpio.pi()
+                if pi.connected:
+                    pi.set_mode(self.gpio_pin, pigpio.INPUT)
+                    pi.set_pull_up_down(self.gpio_pin, pigpio.PUD_OFF)
+                    self._pi = pi
+                elif self.backend == "pigpio":
+                    raise RuntimeError("pigpio daemon not running - start it with 'sudo systemctl start pigpiod'")
+                else:
+                    logger.info("pigpio daemon not running - falling back to GPIO polling")
+            if self._pi is None:
+                _import_gpio()
+                GPIO.setmode(GPIO.BCM)
+                GPIO.setup(self.gpio_pin, GPIO.IN)
             self._setup_done = True
     
     def cleanup(self):
         """Cleanup GPIO"""
         if self._setup_done:
             try:
-                GPIO.cleanup(self.gpio_pin)
+                if self._pi is not None:
+                    self._pi.stop()
+                else:
+                    GPIO.cleanup(self.gpio_pin)
             except:
                 pass
+            self._pi = None
             self._setup_done = False
     
     def capture_raw_timings(self, duration=2.0):
-        """Capture raw pulse timings from GPIO"""
+        """
+        Capture raw pulse timings from GPIO.
+        
+        Returns two parallel sequences: pulse widths in µs (array of int) and
+        the GPIO level during each pulse (bytearray).
+        """
         self.setup()
         
-        timings = []
-        last_state = GPIO.input(self.gpio_pin)
-        last_time = time.time()
-        start_time = last_time
+        if self._pi is not None:
+            return self._capture_edges(duration)
+        if self.backend == "events":
+            return self._capture_events(duration)
+        
+        # Integer nanosecond clock: monotonic and no float math per edge.
+        # Everything the loop touches is bound to a local to skip global and
+        # attribute lookups on each sample.
+        now = time.monotonic_ns
+        gpio_in = GPIO.input
+        pin = self.gpio_pin
+        pulses = array('i')
+        states = bytearray()
+        add_pulse = pulses.append
+        add_state = states.append
+        
+        with _realtime_priority(self.rt_priority):
+            last_state = gpio_in(pin)
+            last_time = now()
+            deadline = last_time + int(duration * 1_000_000_000)
+            
+            while now() < deadline:
+                current_state = gpio_in(pin)
+                if current_state != last_state:
+                    t = now()
+                    add_pulse((t - last_time) // 1000)
+                    add_state(last_state)
+                    last_time = t
+                    last_state = current_state
+        
+        return pulses, states
+
+    def _capture_edges(self, duration):
+        """
+        Capture pulse timings from pigpio edge callbacks.
         
-        while time.time() - start_time < duration:
-            current_state = GPIO.input(self.gpio_pin)
-            if current_state != last_state:
-                pulse_us = int((time.time() - last_time) * 1000000)
-                timings.append((pulse_us, last_state))
-                last_time = time.time()
-                last_state = current_state
+        The daemon timestamps each edge with its 1µs hardware tick, so the
+        process just sleeps for the window instead of spinning on GPIO.input().
+        """
+        edges = []
+        cb = self._pi.callback(
+            self.gpio_pin, pigpio.EITHER_EDGE,
+            lambda gpio, level, tick: edges.append((tick, level))
+        )
+        try:
+            time.sleep(duration)
+        finally:
+            cb.cancel()
+        
+        # Each pulse runs from one edge to the next at the level set by the first
+        pulses = array('i')
+        states = bytearray()
+        for (last_tick, last_state), (tick, _) in zip(edges, edges[1:]):
+            pulses.append(pigpio.tickDiff(last_tick, tick))
+            states.append(last_state)
+        
+        return pulses, states
+
+    def _capture_events(self, duration):
+        """
+        Capture pulse timings from RPi.GPIO edge-detect callbacks.
+        
+        The kernel reports edges and RPi.GPIO's event thread runs the
+        callback, so this thread sleeps instead of polling. The callback only
+        stores a timestamp; levels are inferred by alternating from the level
+        read at the start.
+        """
+        # Bounded so a noisy receiver can't grow the buffer without limit
+        stamps = deque(maxlen=int(duration * 20_000) + 1)
+        now = time.monotonic_ns
+        level = GPIO.input(self.gpio_pin)
+        
+        GPIO.add_event_detect(
+            self.gpio_pin, GPIO.BOTH,
+            callback=lambda channel: stamps.append(now())
+        )
+        try:
+            time.sleep(duration)
+        finally:
+            GPIO.remove_event_detect(self.gpio_pin)
+        
+        pulses = array('i')
+        states = bytearray()
+        last_time = None
+        for t in stamps:
+            level ^= 1
+            if last_time is not None:
+                pulses.append((t - last_time) // 1000)
+                states.append(level ^ 1)
+            last_time = t
+        
+        return pulses, states
+
+    def capture_segments(self, duration=2.0, on_segment=None):
+        """
+        Capture pulses and split them into code segments as edges arrive.
+        
+        Each pulse is inspected once: sync gaps close the current segment and
+        everything else is appended to it, so no edge buffer is kept and the
+        segments are ready when the window ends.
+        
+        `on_segment` is called with each completed segment. With pigpio this
+        happens during the capture window, so decoding overlaps with capture,
+        and a truthy return value ends the window early. The polling loop
+        calls it after the window, since any work done between samples would
+        distort the pulse timings.
+        
+        Returns (segments, sync_gap_count, total_transitions).
+        """
+        self.setup()
+        
+        if self._pi is not None:
+            return self._capture_segments_live(duration, on_segment)
+        if self.backend == "events":
+            pulses, _ = self._capture_events(duration)
+            segments, sync_gaps = self._split_segments(pulses)
+            if on_segment is not None:
+                for segment in segments:
+                    on_segment(segment)
+            return segments, sync_gaps, len(pulses)
+        
+        now = time.monotonic_ns
+        gpio_in = GPIO.input
+        pin = self.gpio_pin
+        threshold = self.sync_gap_threshold
+        segments = []
+        sync_gaps = 0
+        transitions = 0
+        current = array('i')
+        add_pulse = current.append
+        
+        with _realtime_priority(self.rt_priority):
+            last_state = gpio_in(pin)
+            last_time = now()
+            deadline = last_time + int(duration * 1_000_000_000)
+            
+            while now() < deadline:
+                current_state = gpio_in(pin)
+                if current_state != last_state:
+                    t = now()
+                    pulse_us = (t - last_time) // 1000
+                    transitions += 1
+                    if pulse_us > threshold:
+                        # Sync gap - keep the segment if it is long enough
+                        sync_gaps += 1
+                        if len(current) >= 40:
+                            segments.append(current)
+                            current = array('i')
+                            add_pulse = current.append
+                        else:
+                            del current[:]
+                    else:
+                        add_pulse(pulse_us)
+                    last_time = t
+                    last_state = current_state
+        
+        if len(current) >= 40:
+            segments.append(current)
+        
+        if on_segment is not None:
+            for segment in segments:
+                on_segment(segment)
+        
+        return segments, sync_gaps, transitions
+
+    def _capture_segments_live(self, duration, on_segment):
+        """
+        Split pigpio edges into segments while the capture window is open.
         
-        return timings
+        The callback thread only queues the hardware tick of each edge. This
+        thread builds segments from the tick differences and hands each one
+        to `on_segment` as soon as its closing sync gap arrives; capture stops
+        as soon as `on_segment` returns True.
+        """
+        ticks = SimpleQueue()
+        cb = self._pi.callback(
+            self.gpio_pin, pigpio.EITHER_EDGE,
+            lambda gpio, level, tick: ticks.put(tick)
+        )
+        
+        threshold = self.sync_gap_threshold
+        segments = []
+        sync_gaps = 0
+        transitions = 0
+        current = array('i')
+        last_tick = None
+        deadline = time.monotonic_ns() + int(duration * 1_000_000_000)
+        draining = False
+        
+        try:
+            while True:
+                if draining:
+                    try:
+                        tick = ticks.get_nowait()
+                    except Empty:
+                        break
+                else:
+                    remaining = deadline - time.monotonic_ns()
+                    tick = None
+                    if remaining > 0:
+                        try:
+                            tick = ticks.get(timeout=remaining / 1_000_000_000)
+                        except Empty:
+                            pass
+                    if tick is None:
+                        # Window closed: stop capturing, then process the
+                        # edges still queued instead of dropping them
+                        cb.cancel()
+                        draining = True
+                        continue
+                
+                if last_tick is not None:
+                    pulse_us = pigpio.tickDiff(last_tick, tick)
+                    transitions += 1
+                    if pulse_us > threshold:
+                        sync_gaps += 1
+                        if len(current) >= 40:
+                            segments.append(current)
+                            done = on_segment is not None and on_segment(current)
+                            current = array('i')
+                            if done:
+                                break
+                        else:
+                            del current[:]
+                    else:
+                        current.append(pulse_us)
+                last_tick = tick
+        finally:
+            if not draining:
+                cb.cancel()
+        
+        if len(current) >= 40:
+            segments.append(current)
+            if on_segment is not None:
+                on_segment(current)
+        
+        return segments, sync_gaps, transitions
 
-    def find_code_segments(self, timings):
+    def find_code_segments(self, pulses):
         """
         Find segments that start after a sync gap (>4000µs).
         
         PT2262 remotes send the code multiple times with sync gaps between.
         By splitting on these gaps, we isolate individual code transmissions.
+        Segments are slices of `pulses`, so no per-pulse copying is done.
         """
+        return self._split_segments(pulses)[0]
+
+    def _split_segments(self, pulses):
+        """Split captured pulses on sync gaps, returning (segments, sync_gap_count)"""
         segments = []
-        current_segment = []
+        threshold = self.sync_gap_threshold
+        sync_gaps = 0
+        start = 0
         
-        for pulse_us, state in timings:
-            if pulse_us > self.sync_gap_threshold:
+        for i, pulse_us in enumerate(pulses):
+            if pulse_us > threshold:
                 # Sync gap detected - save current segment if valid
-                if len(current_segment) >= 40:
-                    segments.append(current_segment)
-                current_segment = []
-            else:
-                current_segment.append(pulse_us)
+                sync_gaps += 1
+                if i - start >= 40:
+                    segments.append(pulses[start:i])
+                start = i + 1
         
         # Don't forget the last segment
-        if len(current_segment) >= 40:
-            segments.append(current_segment)
+        if len(pulses) - start >= 40:
+            segments.append(pulses[start:])
         
-        return segments
+        return segments, sync_gaps
 
-    def decode_segment(self, durations):
+    def decode_segment(self, durations, short_avg=None, long_avg=None):
         """
         Decode a single segment of pulses into an RF code.
         
         PT2262/EV1527 encoding:
         - Bit 0: short pulse, long pulse
         - Bit 1: long pulse, short pulse
+        
+        Short and long pulse widths are measured from the segment unless both
+        are given, e.g. from an earlier segment of the same transmission.
         """
         if len(durations) < 40:
             return None
         
-        # Dynamically find short and long pulse averages for this segment
-        short_pulses = [d for d in durations if 150 < d < 450]
-        long_pulses = [d for d in durations if 450 < d < 1200]
+        if short_avg is not None and long_avg is not None:
+            return self._decode_with_params(durations, ProtocolParams(short_avg, long_avg, self.tolerance))
         
-        if len(short_pulses) < 10 or len(long_pulses) < 10:
+        # Dynamically find short and long pulse averages for this segment
+        short_sum = short_count = long_sum = long_count = 0
+        for d in durations:
+            if 150 < d < 450:
+                short_sum += d
+                short_count += 1
+            elif 450 < d < 1200:
+                long_sum += d
+                long_count += 1
+        
+        if short_count < 10 or long_count < 10:
             return None
         
-        short_avg = sum(short_pulses) / len(short_pulses)
-        long_avg = sum(long_pulses) / len(long_pulses)
-        
-        # Decode bits
-        bits = []
-        i = 0
-        tol = self.tolerance
-        
-        while i < len(durations) - 1:
-            t1 = durations[i]
-            t2 = durations[i + 1]
-            
-            is_t1_short = abs(t1 - short_avg) < short_avg * tol
-            is_t1_long = abs(t1 - long_avg) < long_avg * tol
-            is_t2_short = abs(t2 - short_avg) < short_avg * tol
-            is_t2_long = abs(t2 - long_avg) < long_avg * tol
-            
-            if is_t1_short and is_t2_long:
-                bits.append(0)
-                i += 2
-            elif is_t1_long and is_t2_short:
-                bits.append(1)
-                i += 2
-            else:
-                i += 1
+        params = ProtocolParams(short_sum / short_count, long_sum / long_count, self.tolerance)
+        return self._decode_with_params(durations, params)
+
+    def _decode_with_params(self, durations, params):
+        """Decode a segment using known short/long pulse widths"""
+        # Classify every pulse once so the bit loop only compares flags.
+        # Tolerance windows are plain bounds, so each test is a range check.
+        short_lo, short_hi = params.short_bounds
+        long_lo, long_hi = params.long_bounds
+        kinds = bytearray(
+            (_SHORT if short_lo < d < short_hi else 0) |
+            (_LONG if long_lo < d < long_hi else 0)
+            for d in durations
+        )
+        
+        code, nbits = _decode_bits(kinds)
         
         # Valid codes are typically 24 bits
-        if 20 <= len(bits) <= 28:
-            code = 0
-            for b in bits[:24]:
-                code = (code << 1) | b
+        if 20 <= nbits <= 28:
+            # Keep the first 24 bits received
+            if nbits > 24:
+                code >>= nbits - 24
             
             if code > 1000:  # Filter noise
                 return {
                     'code': code,
-                    'pulselength': int(short_avg),
+                    'pulselength': int(params.short_us),
                     'protocol': 1,
-                    'bits': len(bits),
-                    'short_pulse': int(short_avg),
-                    'long_pulse': int(long_avg)
+                    'bits': nbits,
+                    'short_pulse': int(params.short_us),
+                    'long_pulse': int(params.long_us)
                 }
         
         return None
@@ -198,17 +656,49 @@ class CustomRFDecoder:
         Returns decoded result or None on timeout.
         """
         self.setup()
-        start_time = time.time()
         
-        while time.time() - start_time < timeout:
-            result = self.capture_single_window(duration=2.0)
-            if result:
-                return result
-            time.sleep(0.1)
+        if self._pi is not None:
+            # Segments are decoded while pigpio captures, so a single window
+            # spanning the whole timeout returns as soon as a code is confirmed
+            try:
+                return self.capture_single_window(duration=timeout, early_exit=True)
+            except RFDecodeError as e:
+                logger.debug(f"No code received ({e.error_type})")
+                return None
+        
+        deadline = time.monotonic_ns() + int(timeout * 1_000_000_000)
+        
+        while True:
+            remaining = deadline - time.monotonic_ns()
+            if remaining <= 0:
+                break
+            
+            # Sleep in the kernel until the receiver sees activity
+            if not self.wait_for_edge(remaining / 1_000_000_000):
+                break
+            
+            try:
+                return self.capture_single_window(duration=2.0)
+            except RFDecodeError as e:
+                logger.debug(f"No code in capture window ({e.error_type}), retrying")
         
         return None
 
-    def capture_single_window(self, duration=2.0, min_confidence=0.5, min_segments=3):
+    def wait_for_edge(self, timeout):
+        """
+        Block until the receiver pin changes level or `timeout` seconds pass.
+        
+        Returns True if an edge was seen, False on timeout.
+        """
+        self.setup()
+        
+        if self._pi is not None:
+            return self._pi.wait_for_edge(self.gpio_pin, pigpio.EITHER_EDGE, timeout)
+        
+        channel = GPIO.wait_for_edge(self.gpio_pin, GPIO.BOTH, timeout=max(1, int(timeout * 1000)))
+        return channel is not None
+
+    def capture_single_window(self, duration=2.0, min_confidence=0.5, min_segments=3, early_exit=True):
         """
         Capture a single window of RF data and decode it.
         
@@ -223,6 +713,7 @@ class CustomRFDecoder:
             duration: How long to capture (default 2 seconds)
             min_confidence: Minimum ratio of primary code occurrences to total segments (default 0.5)
             min_segments: Minimum number of valid segments required (default 3)
+            early_exit: Stop capturing once one code clearly dominates (pigpio only)
             
         Returns:
             dict with code info if successful
@@ -230,9 +721,43 @@ class CustomRFDecoder:
         """
         self.setup()
         
-        # Capture raw timings
-        timings = self.capture_raw_timings(duration=duration)
-        total_transitions = len(timings)
+        # Decode each segment as the capture produces it and count code occurrences
+        codes_found = Counter()
+        first_result = {}
+        decode_failures = 0
+        
+        def decode(segment):
+            nonlocal decode_failures
+            # Each segment is measured on its own: widths from another segment
+            # misclassify jittered pulses and yield a different code, not None
+            result = self.decode_segment(segment)
+            if result and result['code'] > 1000:
+                code = result['code']
+                codes_found[code] += 1
+                first_result.setdefault(code, result)
+            else:
+                decode_failures += 1
+                return False
+            if not early_exit:
+                return False
+            
+            # Stop early once one code clearly dominates. This is stricter
+            # than the checks below, so it never turns a failure into success.
+            total = sum(codes_found.values())
+            top = codes_found.most_common(2)
+            best_count = top[0][1]
+            second_count = top[1][1] if len(top) > 1 else 0
+            return (
+                total >= min_segments + 1
+                and best_count >= min_segments
+                and best_count >= 2 * second_count
+                and best_count / total >= min_confidence
+            )
+        
+        # Capture and split into segments in a single pass over the edges
+        segments, num_sync_gaps, total_transitions = self.capture_segments(
+            duration=duration, on_segment=decode
+        )
         
         # Check 1: Did we capture any transitions at all?
         if total_transitions < 40:
@@ -246,9 +771,6 @@ class CustomRFDecoder:
                 }
             )
         
-        # Find sync gaps (markers between code transmissions)
-        sync_gaps = [t[0] for t in timings if t[0] > self.sync_gap_threshold]
-        num_sync_gaps = len(sync_gaps)
         logger.info(f"Captured {total_transitions} transitions, {num_sync_gaps} sync gaps")
         
         # Check 2: Do we have sync gaps indicating PT2262/EV1527 protocol?
@@ -264,8 +786,7 @@ class CustomRFDecoder:
                 }
             )
         
-        # Find code segments using sync gap detection
-        segments = self.find_code_segments(timings)
+        # Segments were already split on sync gaps during capture
         num_segments = len(segments)
         
         # Check 3: Did we get valid segments?
@@ -284,23 +805,6 @@ class CustomRFDecoder:
         
         logger.info(f"Found {num_segments} valid segments")
         
-        # Try to decode each segment and count code occurrences
-        codes_found = {}
-        decode_failures = 0
-        for seg in segments:
-            result = self.decode_segment(seg)
-            if result and result['code'] > 1000:
-                code = result['code']
-                if code not in codes_found:
-                    codes_found[code] = {
-                        'result': result,
-                        'count': 1
-                    }
-                else:
-                    codes_found[code]['count'] += 1
-            else:
-                decode_failures += 1
-        
         # Check 4: Could we decode any segments?
         if not codes_found:
             raise RFDecodeError(
@@ -316,20 +820,18 @@ class CustomRFDecoder:
             )
         
         # Find the most frequently seen code
-        sorted_codes = sorted(codes_found.items(), key=lambda x: x[1]['count'], reverse=True)
-        best_code_value, best_code_data = sorted_codes[0]
-        best_count = best_code_data['count']
+        best_code_value, best_count = codes_found.most_common(1)[0]
         
         # Calculate confidence: how dominant is the primary code?
-        total_decoded = sum(d['count'] for d in codes_found.values())
+        total_decoded = sum(codes_found.values())
         confidence = best_count / total_decoded if total_decoded > 0 else 0
         
         # Check 5: Is the signal clear and unambiguous?
         if confidence < min_confidence:
             # Build details about competing codes
             competing_codes = [
-                {"code": c, "count": d['count'], "percentage": round(d['count']/total_decoded*100, 1)}
-                for c, d in sorted_codes[:5]  # Top 5 codes
+                {"code": c, "count": n, "percentage": round(n/total_decoded*100, 1)}
+                for c, n in codes_found.most_common(5)
             ]
             raise RFDecodeError(
                 error_type="AMBIGUOUS_SIGNAL",
@@ -361,7 +863,7 @@ class CustomRFDecoder:
             )
         
         # SUCCESS! Build the result
-        result = best_code_data['result'].copy()
+        result = first_result[best_code_value].copy()
         result['times_seen'] = best_count
         result['segments_found'] = num_segments
         result['total_codes_found'] = len(codes_found)
@@ -370,7 +872,7 @@ class CustomRFDecoder:
         
         # Log results
         if len(codes_found) > 1:
-            outliers = [f"{c} ({d['count']}x)" for c, d in sorted_codes[1:]]
+            outliers = [f"{c} ({n}x)" for c, n in codes_found.most_common()[1:]]
             logger.info(f"Primary code: {best_code_value} ({best_count}x, {confidence*100:.0f}% confidence), outliers: {outliers}")
         else:
             logger.info(f"Decoded code {best_code_value} (seen {best_count}x, 100% consistent)")
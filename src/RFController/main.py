@@ -4,6 +4,7 @@ Main entry point for CherryPi RF Controller
 Runs all services: redis_listener, config_listener, sniffer_service
 """
 
+import os
 import subprocess
 import sys
 import signal
@@ -17,20 +18,51 @@ def signal_handler(sig, frame):
     """Handle shutdown signals"""
     logging.info("Shutting down all services...")
     for proc in processes:
-        if proc.poll() is None:  # Process is still running
-            proc.terminate()
+        if proc.returncode is None:  # Process is still running
+            signal_group(proc, signal.SIGTERM)
     
     # Wait for processes to terminate
     for proc in processes:
         try:
             proc.wait(timeout=5)
         except subprocess.TimeoutExpired:
-            proc.kill()
+            signal_group(proc, signal.SIGKILL)
     
     logging.info("All services stopped.")
     sys.exit(0)
 
 
+def signal_group(proc, sig):
+    """Signal a service and anything it spawned (each runs in its own session)"""
+    try:
+        os.killpg(proc.pid, sig)
+    except ProcessLookupError:
+        pass
+
+
+def supervise(services):
+    """
+    Block until services exit and log each one as it does.
+    
+    os.waitpid sleeps in the kernel until a child exits, so a healthy
+    system costs no wakeups and a crash is reported immediately.
+    """
+    running = {proc.pid: (name, proc) for (name, _), proc in zip(services, processes)}
+    while running:
+        try:
+            pid, status = os.waitpid(-1, 0)
+        except ChildProcessError:
+            break
+        if pid not in running:
+            continue  # orphan reaped when running as PID 1
+        name, proc = running.pop(pid)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        logging.error(f"{name} exited with code {proc.returncode}")
+        # Could add restart logic here if needed
+    
+    logging.error("All services have exited.")
+
+
 def main():
     logging.basicConfig(
         level=logging.INFO,
@@ -54,7 +86,8 @@ def main():
         proc = subprocess.Popen(
             cmd,
             stdout=sys.stdout,
-            stderr=sys.stderr
+            stderr=sys.stderr,
+            start_new_session=True
         )
         processes.append(proc)
         time.sleep(0.5)  # Small delay between service starts
@@ -62,13 +95,8 @@ def main():
     logging.info(f"All {len(services)} services started.")
     
     # Monitor processes
-    while True:
-        for i, (name, _) in enumerate(services):
-            proc = processes[i]
-            if proc.poll() is not None:
-                logging.error(f"{name} exited with code {proc.returncode}")
-                # Could add restart logic here if needed
-        time.sleep(5)
+    supervise(services)
+    sys.exit(1)
 
 
 if __name__ == '__main__':
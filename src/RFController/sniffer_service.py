@@ -21,7 +21,9 @@ logging.basicConfig(
 
 # Try to import custom RF decoder, then fall back to rpi_rf
 try:
-    from custom_rf_decoder import CustomRFDecoder, RFDecodeError
+    from custom_rf_decoder import CustomRFDecoder, RFDecodeError, gpio_available
+    if not gpio_available():
+        raise ImportError("RPi.GPIO not available - custom RF decoder requires GPIO access")
     RF_AVAILABLE = True
     USE_CUSTOM_DECODER = True
     logging.info("✅ Using custom RF decoder (calibrated for this hardware)")
@@ -62,6 +64,46 @@ def get_sniffer_timeout():
     return settings.get('sniffer_timeout', 30)
 
 
+def get_capture_backend():
+    """Get RF capture backend from settings (see CustomRFDecoder.BACKENDS)"""
+    settings = get_settings()
+    return settings.get('rf_capture_backend', 'auto')
+
+
+def get_capture_rt_priority():
+    """Get the SCHED_FIFO priority for polling captures from settings (None = off)"""
+    settings = get_settings()
+    priority = settings.get('rf_capture_rt_priority')
+    if priority is None:
+        return None
+    try:
+        priority = int(priority)
+    except (TypeError, ValueError):
+        priority = None
+    if priority is None or not 1 <= priority <= 99:
+        logging.warning(f"Ignoring invalid rf_capture_rt_priority: {settings['rf_capture_rt_priority']!r} (expected 1-99)")
+        return None
+    return priority
+
+
+def create_rx_device(gpio_pin, code_received):
+    """
+    Create an rpi_rf RX device that sets `code_received` on each decoded code.
+    
+    rpi_rf decodes in its GPIO edge callback, so waiting on the event replaces
+    polling rx_code_timestamp in a sleep loop. Only used when rpi_rf was
+    imported as the fallback decoder above.
+    """
+    class SignalingRFDevice(RFDevice):
+        def rx_callback(self, gpio):
+            timestamp = self.rx_code_timestamp
+            super().rx_callback(gpio)
+            if self.rx_code_timestamp != timestamp:
+                code_received.set()
+    
+    return SignalingRFDevice(gpio_pin)
+
+
 def run_sniffer(r, request_id, capture_type):
     """
     Run the RF sniffer and capture codes.
@@ -107,7 +149,11 @@ def run_sniffer(r, request_id, capture_type):
             logging.info(f"Using custom decoder - capturing for {capture_duration}s")
             
             # Create decoder and capture for exactly 2 seconds
-            decoder = CustomRFDecoder(gpio_pin)
+            decoder = CustomRFDecoder(
+                gpio_pin,
+                backend=get_capture_backend(),
+                rt_priority=get_capture_rt_priority()
+            )
             
             try:
                 result = decoder.capture_single_window(duration=capture_duration)
@@ -147,23 +193,22 @@ def run_sniffer(r, request_id, capture_type):
         elif RF_AVAILABLE:
             # Fallback to rpi_rf - simple 2 second capture
             logging.warning("Using rpi_rf fallback (less accurate)")
-            from rpi_rf import RFDevice
             
-            rfdevice = RFDevice(gpio_pin)
+            code_received = threading.Event()
+            rfdevice = create_rx_device(gpio_pin, code_received)
             rfdevice.enable_rx()
             
-            # Capture for 2 seconds, take whatever code we get
-            start_time = time.time()
+            # Capture for 2 seconds, keep the last code received
+            deadline = time.monotonic() + capture_duration
             captured_code = None
             
-            while time.time() - start_time < capture_duration:
-                if rfdevice.rx_code_timestamp:
-                    captured_code = {
-                        'code': rfdevice.rx_code,
-                        'pulselength': rfdevice.rx_pulselength,
-                        'protocol': rfdevice.rx_proto
-                    }
-                time.sleep(0.01)
+            while code_received.wait(max(0, deadline - time.monotonic())):
+                code_received.clear()
+                captured_code = {
+                    'code': rfdevice.rx_code,
+                    'pulselength': rfdevice.rx_pulselength,
+                    'protocol': rfdevice.rx_proto
+                }
             
             rfdevice.cleanup()
             
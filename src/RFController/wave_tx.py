@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+pigpio waveform transmitter for CherryPi
+Plays a whole RF frame from a DMA-timed waveform instead of toggling the
+pin from Python with time.sleep(), so every pulse is exact to the µs.
+
+Drop-in for the rpi_rf.RFDevice TX calls used by controller.py.
+"""
+
+import logging
+import time
+from collections import OrderedDict
+
+# pigpio is optional - without its daemon controller.py uses rpi_rf
+try:
+    import pigpio
+except ImportError:
+    pigpio = None
+
+logger = logging.getLogger(__name__)
+
+# (pulselength, sync_high, sync_low, zero_high, zero_low, one_high, one_low),
+# matching rpi_rf's protocol table
+PROTOCOLS = {
+    1: (350, 1, 31, 1, 3, 3, 1),
+    2: (650, 1, 10, 1, 2, 2, 1),
+    3: (100, 30, 71, 4, 11, 9, 6),
+    4: (380, 1, 6, 1, 3, 3, 1),
+    5: (500, 6, 14, 1, 2, 2, 1),
+    6: (200, 1, 10, 1, 5, 1, 1),
+}
+
+TX_REPEAT = 10  # frames per send, same as rpi_rf
+MAX_CACHED_WAVES = 16  # waveforms share the daemon's limited DMA control blocks
+
+
+class WaveTransmitter:
+    """
+    Send codes as pigpio waveforms.
+
+    A waveform holds all TX_REPEAT frames of a code and is kept for reuse,
+    since outlets are switched with the same few codes over and over.
+    """
+
+    def __init__(self, gpio, pi):
+        self.gpio = gpio
+        self.pi = pi
+        self._waves = OrderedDict()  # (code, protocol, pulselength) -> wave id
+        self.setup_pin()
+
+    def setup_pin(self):
+        """Drive the TX pin as a low output (again, if another library reset it)"""
+        self.pi.set_mode(self.gpio, pigpio.OUTPUT)
+        self.pi.write(self.gpio, 0)
+
+    @classmethod
+    def connect(cls, gpio):
+        """Return a transmitter on `gpio`, or None if the pigpio daemon is unavailable"""
+        if pigpio is None:
+            return None
+        pi = pigpio.pi()
+        if not pi.connected:
+            logger.info("pigpio daemon not running - transmitting with rpi_rf")
+            return None
+        return cls(gpio, pi)
+
+    def frame_pulses(self, code, protocol, pulselength):
+        """Build the (high_us, low_us) pairs for one frame, as rpi_rf sends it"""
+        _, sync_high, sync_low, zero_high, zero_low, one_high, one_low = PROTOCOLS[protocol]
+        zero = (zero_high * pulselength, zero_low * pulselength)
+        one = (one_high * pulselength, one_low * pulselength)
+        sync = (sync_high * pulselength, sync_low * pulselength)
+
+        length = 32 if protocol == 6 or code > 16777216 else 24
+        bits = format(code, f'0{length}b')
+        frame = []
+        if protocol == 6:
+            # Nexa: the frame opens with a sync and each bit is sent as 01 or 10
+            bits = bits.replace('0', 'x').replace('1', '10').replace('x', '01')
+            frame.append(sync)
+        frame.extend(one if bit == '1' else zero for bit in bits)
+        frame.append(sync)
+        return frame
+
+    def _wave(self, code, protocol, pulselength):
+        """Get the waveform for a code, creating and caching it on first use"""
+        key = (code, protocol, pulselength)
+        wid = self._waves.get(key)
+        if wid is not None:
+            self._waves.move_to_end(key)
+            return wid
+
+        mask = 1 << self.gpio
+        pulses = []
+        for high_us, low_us in self.frame_pulses(code, protocol, pulselength) * TX_REPEAT:
+            pulses.append(pigpio.pulse(mask, 0, high_us))
+            pulses.append(pigpio.pulse(0, mask, low_us))
+
+        if len(self._waves) >= MAX_CACHED_WAVES:
+            _, oldest = self._waves.popitem(last=False)
+            self.pi.wave_delete(oldest)
+
+        try:
+            wid = self._create_wave(pulses)
+        except pigpio.error as e:
+            # Out of DMA control blocks: drop every cached waveform and retry
+            logger.warning(f"pigpio wave_create failed ({e}), clearing cached waveforms")
+            self.pi.wave_clear()
+            self._waves.clear()
+            wid = self._create_wave(pulses)
+        self._waves[key] = wid
+        return wid
+
+    def _create_wave(self, pulses):
+        self.pi.wave_add_new()
+        self.pi.wave_add_generic(pulses)
+        return self.pi.wave_create()
+
+    def tx_code(self, code, tx_proto=None, tx_pulselength=None):
+        """Send a decimal code and wait until the waveform has played"""
+        protocol = tx_proto or 1
+        if protocol not in PROTOCOLS:
+            logger.error("Unknown TX protocol")
+            return False
+        pulselength = tx_pulselength or PROTOCOLS[protocol][0]
+
+        self.pi.wave_send_once(self._wave(code, protocol, pulselength))
+        while self.pi.wave_tx_busy():
+            time.sleep(0.001)
+        return True
+
+    def cleanup(self):
+        """Delete cached waveforms and release the daemon connection"""
+        try:
+            for wid in self._waves.values():
+                self.pi.wave_delete(wid)
+            self.pi.write(self.gpio, 0)
+            self.pi.stop()
+        except Exception:
+            pass
+        self._waves.clear()
@@ -77,6 +77,110 @@ def test_config_manager_get_next_id_empty():
         assert next_id == 1
 
 
+def test_config_manager_save_and_load_roundtrip():
+    """Test that a saved config is read back unchanged"""
+    from RFController import config_manager
+    
+    test_config = {
+        "switches": [{"id": 1, "name": "Lamp", "on_code": 111, "off_code": 112}],
+        "settings": {"gpio_tx_pin": 17}
+    }
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_file = os.path.join(tmp_dir, 'config.json')
+        with patch.object(config_manager, 'CONFIG_FILE', config_file):
+            config_manager.save_config(test_config)
+            
+            with open(config_file) as f:
+                assert json.load(f) == test_config
+            assert config_manager.load_config() == test_config
+        
+        assert os.listdir(tmp_dir) == ['config.json']
+
+
+def test_config_manager_load_config_cached_until_file_changes():
+    """Test that load_config skips re-reading an unchanged file"""
+    from RFController import config_manager
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_file = os.path.join(tmp_dir, 'config.json')
+        with open(config_file, 'w') as f:
+            json.dump({"switches": [], "settings": {}}, f)
+        
+        with patch.object(config_manager, 'CONFIG_FILE', config_file), \
+             patch.object(config_manager, 'RACY_WINDOW_NS', -1):
+            first = config_manager.load_config()
+            assert config_manager.load_config() is first
+            
+            with open(config_file, 'w') as f:
+                json.dump({"switches": [{"id": 3}], "settings": {}}, f)
+            
+            assert config_manager.load_config()['switches'] == [{"id": 3}]
+
+
+def test_config_manager_save_falls_back_when_replace_fails():
+    """Test that save_config still writes when os.replace is not possible"""
+    from RFController import config_manager
+    
+    test_config = {"switches": [], "settings": {"protocol": 1}}
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_file = os.path.join(tmp_dir, 'config.json')
+        with patch.object(config_manager, 'CONFIG_FILE', config_file), \
+             patch.object(config_manager.os, 'replace', side_effect=OSError(16, 'Device or resource busy')):
+            config_manager.save_config(test_config)
+        
+        with open(config_file) as f:
+            assert json.load(f) == test_config
+        assert os.listdir(tmp_dir) == ['config.json']
+
+
+def test_config_manager_skips_superseded_write():
+    """Test that a save serialized before a newer, already written one is not written"""
+    from RFController import config_manager
+    
+    write_config_file = config_manager._write_config_file
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_file = os.path.join(tmp_dir, 'config.json')
+        with patch.object(config_manager, 'CONFIG_FILE', config_file):
+            with patch.object(config_manager, '_write_config_file') as mock_write:
+                config_manager.save_config({"switches": [], "settings": {"v": 1}})
+                config_manager.save_config({"switches": [], "settings": {"v": 2}})
+            (old_data, old_seq), (new_data, new_seq) = [c.args for c in mock_write.call_args_list]
+            
+            # The newer save reaches the disk first
+            write_config_file(new_data, new_seq)
+            write_config_file(old_data, old_seq)
+            
+            with open(config_file) as f:
+                assert json.load(f)["settings"] == {"v": 2}
+            assert config_manager.load_config()["settings"] == {"v": 2}
+
+
+def test_config_manager_sync_to_redis_pipelines_keys():
+    """Test that switches and settings are written in one pipeline"""
+    from RFController import config_manager
+    
+    test_config = {
+        "switches": [{"id": 1, "name": "Lamp", "on_code": 111, "off_code": 112}],
+        "settings": {"gpio_tx_pin": 17}
+    }
+    mock_redis = MagicMock()
+    pipe = mock_redis.pipeline.return_value.__enter__.return_value
+    
+    with patch.object(config_manager, 'load_config', return_value=test_config):
+        with patch.object(config_manager, 'get_redis_client', return_value=mock_redis):
+            assert config_manager.sync_to_redis() is True
+    
+    mock_redis.set.assert_not_called()
+    assert pipe.set.call_count == 2
+    key, value = pipe.set.call_args_list[0][0]
+    assert key == config_manager.REDIS_CONFIG_KEY
+    assert json.loads(value) == test_config["switches"]
+    pipe.execute.assert_called_once()
+
+
 # --- Test controller ---
 
 def test_control_outlet_on():
@@ -117,3 +221,256 @@ def test_control_outlet_invalid_state():
         with patch.object(controller, 'send_code') as mock_send_code:
             controller.control_outlet(1, "invalid")
             mock_send_code.assert_not_called()
+
+
+def test_send_code_reuses_device():
+    """Test that repeated sends share one enabled RFDevice"""
+    from RFController import controller
+    
+    config = {'gpio_pin': 17, 'pulse_length': 189, 'protocol': 1}
+    controller._rfdevice_cache.clear()
+    
+    with patch.object(controller, 'get_config', return_value=config), \
+         patch.object(controller.WaveTransmitter, 'connect', return_value=None):
+        with patch.object(controller, 'RFDevice') as mock_device_cls:
+            controller.send_code(111)
+            controller.send_code(112)
+            
+            mock_device_cls.assert_called_once_with(17)
+            device = mock_device_cls.return_value
+            device.enable_tx.assert_called_once()
+            assert device.tx_code.call_count == 2
+            device.tx_code.assert_called_with(112, 1, 189)
+    
+    controller._rfdevice_cache.clear()
+
+
+def test_send_code_reconnects_after_device_failure():
+    """Test that a failed transmit drops the cached device and retries on a new one"""
+    from RFController import controller
+    
+    config = {'gpio_pin': 17, 'pulse_length': 189, 'protocol': 1}
+    stale, fresh = MagicMock(spec=controller.WaveTransmitter), MagicMock(spec=controller.WaveTransmitter)
+    stale.tx_code.side_effect = BrokenPipeError
+    controller._rfdevice_cache.clear()
+    
+    with patch.object(controller, 'get_config', return_value=config), \
+         patch.object(controller.WaveTransmitter, 'connect', side_effect=[stale, fresh]):
+        controller.send_code(111)
+        controller.send_code(112)
+    
+    stale.cleanup.assert_called_once()
+    assert [c.args for c in fresh.tx_code.call_args_list] == [(111, 1, 189), (112, 1, 189)]
+    
+    controller._rfdevice_cache.clear()
+
+
+def test_send_code_switches_to_pigpio_when_daemon_returns():
+    """Test that a pin that fell back to rpi_rf moves to pigpio once the daemon is up"""
+    from RFController import controller
+    
+    config = {'gpio_pin': 17, 'pulse_length': 189, 'protocol': 1}
+    transmitter = MagicMock(spec=controller.WaveTransmitter)
+    controller._rfdevice_cache.clear()
+    
+    with patch.object(controller, 'get_config', return_value=config), \
+         patch.object(controller, 'PIGPIO_RETRY_INTERVAL', 0), \
+         patch.object(controller.WaveTransmitter, 'connect', side_effect=[None, transmitter]), \
+         patch.object(controller, 'RFDevice') as mock_device_cls:
+        controller.send_code(111)
+        controller.send_code(112)
+    
+    mock_device_cls.return_value.tx_code.assert_called_once_with(111, 1, 189)
+    mock_device_cls.return_value.cleanup.assert_called_once()
+    transmitter.setup_pin.assert_called_once()
+    transmitter.tx_code.assert_called_once_with(112, 1, 189)
+    
+    controller._rfdevice_cache.clear()
+
+
+# --- Test config_listener ---
+
+def test_config_listener_batch_saves_once():
+    """Test that a burst of commands is saved and synced once, then answered"""
+    import config_manager
+    from RFController import config_listener
+    
+    messages = [
+        json.dumps({"action": "add_switch", "request_id": "a",
+                    "data": {"name": "Lamp", "on_code": 111, "off_code": 112}}),
+        json.dumps({"action": "add_switch", "request_id": "b",
+                    "data": {"name": "Fan", "on_code": 221, "off_code": 222}}),
+        json.dumps({"action": "get_switches", "request_id": "c"}),
+    ]
+    mock_redis = MagicMock()
+    
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_file = os.path.join(tmp_dir, 'config.json')
+        with open(config_file, 'w') as f:
+            json.dump({"switches": [], "settings": {}}, f)
+        
+        with patch.object(config_manager, 'CONFIG_FILE', config_file), \
+             patch.object(config_manager, 'save_config', wraps=config_manager.save_config) as mock_save, \
+             patch.object(config_manager, 'sync_to_redis') as mock_sync:
+            config_listener.handle_commands_batch(mock_redis, messages)
+            
+            mock_save.assert_called_once()
+            mock_sync.assert_called_once()
+            assert [s['id'] for s in config_manager.load_config()['switches']] == [1, 2]
+    
+    pipe = mock_redis.pipeline.return_value.__enter__.return_value
+    pipe.execute.assert_called_once()
+    responses = [json.loads(c[0][1]) for c in pipe.publish.call_args_list]
+    assert [resp['request_id'] for resp in responses] == ["a", "b", "c"]
+    assert all(resp['success'] for resp in responses)
+    assert len(responses[2]['data']) == 2
+
+
+def test_config_listener_batch_responses_snapshot_data():
+    """Test that each response reports the config as it was when its command ran"""
+    import config_manager
+    from RFController import config_listener
+
+    messages = [
+        json.dumps({"action": "get_switches", "request_id": "a"}),
+        json.dumps({"action": "add_switch", "request_id": "b",
+                    "data": {"name": "Fan", "on_code": 221, "off_code": 222}}),
+        json.dumps({"action": "update_switch", "request_id": "c", "data": {"id": 1, "name": "B"}}),
+        json.dumps({"action": "update_switch", "request_id": "d", "data": {"id": 1, "name": "C"}}),
+    ]
+    mock_redis = MagicMock()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        config_file = os.path.join(tmp_dir, 'config.json')
+        with open(config_file, 'w') as f:
+            json.dump({"switches": [{"id": 1, "name": "A", "on_code": 111, "off_code": 112}],
+                       "settings": {}}, f)
+        os.utime(config_file, (0, 0))  # old enough for the cache to be trusted
+
+        with patch.object(config_manager, 'CONFIG_FILE', config_file), \
+             patch.object(config_manager, 'sync_to_redis'):
+            config_manager.load_config()  # warm the cache
+            config_listener.handle_commands_batch(mock_redis, messages)
+
+    pipe = mock_redis.pipeline.return_value.__enter__.return_value
+    responses = [json.loads(c[0][1]) for c in pipe.publish.call_args_list]
+    assert [s['id'] for s in responses[0]['data']] == [1]
+    assert responses[2]['data']['name'] == "B"
+    assert responses[3]['data']['name'] == "C"
+
+
+def test_config_listener_batch_save_failure_fails_changes():
+    """Test that a failed batch save is still answered, with every change failed"""
+    import config_manager
+    from RFController import config_listener
+
+    messages = [
+        json.dumps({"action": "add_switch", "request_id": "a",
+                    "data": {"name": "Lamp", "on_code": 111, "off_code": 112}}),
+        json.dumps({"action": "get_next_id", "request_id": "b"}),
+    ]
+    mock_redis = MagicMock()
+
+    with patch.object(config_manager, 'load_config', return_value={"switches": [], "settings": {}}), \
+         patch.object(config_manager, 'save_config', side_effect=OSError(28, "No space left on device")), \
+         patch.object(config_manager, 'sync_to_redis') as mock_sync:
+        config_listener.handle_commands_batch(mock_redis, messages)
+
+    mock_sync.assert_not_called()
+    pipe = mock_redis.pipeline.return_value.__enter__.return_value
+    responses = [json.loads(c[0][1]) for c in pipe.publish.call_args_list]
+    assert [resp['request_id'] for resp in responses] == ["a", "b"]
+    assert responses[0]['success'] is False
+    assert responses[0]['data'] is None
+    assert "No space left on device" in responses[0]['error']
+    assert responses[1]['success'] is True
+
+
+def test_send_codes_batches_on_one_device():
+    """Test that send_codes transmits every code on a single device"""
+    from RFController import controller
+    
+    config = {'gpio_pin': 17, 'pulse_length': 189, 'protocol': 1}
+    controller._rfdevice_cache.clear()
+    
+    with patch.object(controller, 'get_config', return_value=config), \
+         patch.object(controller.WaveTransmitter, 'connect', return_value=None):
+        with patch.object(controller, 'RFDevice') as mock_device_cls:
+            controller.send_codes([111, 221, 331], repeats=2)
+            
+            mock_device_cls.assert_called_once_with(17)
+            sent = [c[0][0] for c in mock_device_cls.return_value.tx_code.call_args_list]
+            assert sent == [111, 111, 221, 221, 331, 331]
+    
+    controller._rfdevice_cache.clear()
+
+
+def test_config_listener_error_responses():
+    """Test that handler errors and unknown actions produce failed responses"""
+    import config_manager
+    from RFController import config_listener
+    
+    with patch.object(config_manager, 'load_config', return_value={"switches": [], "settings": {}}):
+        missing = config_listener.process_command(
+            json.dumps({"action": "get_switch", "request_id": "a", "data": {"id": 7}}))
+        invalid = config_listener.process_command(
+            json.dumps({"action": "add_switch", "request_id": "b", "data": {"name": "Lamp"}}))
+        unknown = config_listener.process_command(
+            json.dumps({"action": "reboot", "request_id": "c"}))
+    
+    assert missing['success'] is False
+    assert missing['error'] == "Switch 7 not found"
+    assert invalid['error'] == "Missing required fields: name, on_code, off_code"
+    assert unknown['error'] == "Unknown action: reboot"
+    assert config_listener.process_command("not json") is None
+
+
+def test_config_listener_reconnect_delay_backs_off():
+    """Test that reconnect delays grow exponentially up to the cap"""
+    from RFController import config_listener
+    
+    delays = [config_listener.reconnect_delay(n) for n in range(8)]
+    
+    assert delays[:4] == [0.5, 1, 2, 4]
+    assert delays[-1] == config_listener.RECONNECT_MAX_DELAY
+    assert delays == sorted(delays)
+
+
+# --- Test sniffer_service ---
+
+def test_sniffer_capture_rt_priority_validated():
+    """Test that the real-time priority setting is coerced to int, and bad values disable it"""
+    from RFController import sniffer_service
+    
+    def priority(value):
+        with patch.object(sniffer_service, 'get_settings', return_value={'rf_capture_rt_priority': value}):
+            return sniffer_service.get_capture_rt_priority()
+    
+    assert priority(None) is None
+    assert priority(50) == 50
+    assert priority("50") == 50
+    assert priority("high") is None
+    assert priority(0) is None
+    assert priority(150) is None
+    assert priority([50]) is None
+
+
+# --- Test main supervisor ---
+
+def test_supervise_reports_each_exit_once():
+    """Test that the supervisor blocks in waitpid and skips unknown children"""
+    from RFController import main
+
+    services = [('Redis Listener', []), ('Sniffer Service', [])]
+    procs = [MagicMock(pid=101, returncode=None), MagicMock(pid=102, returncode=None)]
+    exits = [(102, 1 << 8), (999, 0), (101, 0)]
+
+    with patch.object(main, 'processes', procs), \
+         patch.object(main.os, 'waitpid', side_effect=exits) as mock_waitpid, \
+         patch.object(main.logging, 'error') as mock_error:
+        main.supervise(services)
+
+    assert mock_waitpid.call_count == 3
+    assert [p.returncode for p in procs] == [0, 1]
+    assert mock_error.call_args_list[0].args[0] == "Sniffer Service exited with code 1"
+    assert mock_error.call_args_list[1].args[0] == "Redis Listener exited with code 0"
@@ -0,0 +1,474 @@
+import sys
+import os
+from array import array
+from bisect import bisect_right
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+# Add RFController to path for relative imports within that module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src/RFController')))
+
+# Conditionally mock RPi.GPIO if it is not available
+try:
+    import RPi.GPIO
+except ImportError:
+    sys.modules['RPi'] = MagicMock()
+    sys.modules['RPi.GPIO'] = MagicMock()
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from RFController.custom_rf_decoder import CustomRFDecoder, RFDecodeError, _realtime_priority
+
+SHORT_US = 180
+LONG_US = 550
+SYNC_US = 5700
+
+
+def encode_segment(code, bits=24, short_us=SHORT_US, long_us=LONG_US):
+    """Build PT2262 pulse durations for a code (bit 0: short/long, bit 1: long/short)"""
+    durations = []
+    for i in range(bits - 1, -1, -1):
+        if (code >> i) & 1:
+            durations += [long_us, short_us]
+        else:
+            durations += [short_us, long_us]
+    return durations
+
+
+def capture(*codes):
+    """Build a raw capture: each code's segment followed by a sync gap"""
+    pulses = array('i', [SYNC_US])
+    for code in codes:
+        pulses.extend(encode_segment(code))
+        pulses.append(SYNC_US)
+    states = bytearray(i % 2 for i in range(len(pulses)))
+    return pulses, states
+
+
+def fake_capture_segments(*codes):
+    """Build a stand-in for capture_segments() that yields the given codes"""
+    pulses, _ = capture(*codes)
+    segments = [array('i', encode_segment(code)) for code in codes]
+
+    def capture_segments(duration=2.0, on_segment=None):
+        if on_segment is not None:
+            for segment in segments:
+                on_segment(segment)
+        return segments, len(codes) + 1, len(pulses)
+
+    return capture_segments
+
+
+# --- Test decode_segment ---
+
+def test_decode_segment_valid_code():
+    """Test decoding a clean 24-bit segment"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+
+    result = decoder.decode_segment(encode_segment(5592405))
+
+    assert result is not None
+    assert result['code'] == 5592405
+    assert result['bits'] == 24
+    assert result['short_pulse'] == SHORT_US
+    assert result['long_pulse'] == LONG_US
+
+
+def test_decode_segment_resyncs_after_glitch():
+    """Test that a stray pulse is skipped and decoding continues"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+
+    durations = encode_segment(1398101)
+    durations.insert(0, 2000)  # noise before the first bit
+
+    result = decoder.decode_segment(durations)
+
+    assert result is not None
+    assert result['code'] == 1398101
+
+
+def test_decode_segment_with_known_pulse_widths():
+    """Test decoding with short/long widths supplied by the caller"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+
+    result = decoder.decode_segment(encode_segment(5592405), SHORT_US, LONG_US)
+
+    assert result['code'] == 5592405
+    assert result['short_pulse'] == SHORT_US
+    assert result['long_pulse'] == LONG_US
+
+
+def test_decode_segment_reports_measured_widths_of_overlapping_remote():
+    """Test that a remote within tolerance of one decoded earlier reports its own widths"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+
+    decoder.decode_segment(encode_segment(5592405, short_us=180, long_us=550))
+    result = decoder.decode_segment(encode_segment(1398101, short_us=240, long_us=720))
+
+    assert result['code'] == 1398101
+    assert result['pulselength'] == 240
+    assert (result['short_pulse'], result['long_pulse']) == (240, 720)
+
+
+def test_decode_segment_too_short():
+    """Test that short segments are rejected"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+
+    assert decoder.decode_segment(encode_segment(5592405)[:30]) is None
+
+
+def test_decode_segment_noise():
+    """Test that segments without short/long pulses are rejected"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+
+    assert decoder.decode_segment([2000] * 48) is None
+
+
+# --- Test find_code_segments ---
+
+def test_find_code_segments_splits_on_sync_gaps():
+    """Test that segments are split on sync gaps and short ones dropped"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    pulses, _ = capture(5592405, 1398101)
+    pulses.extend([SHORT_US] * 10)  # trailing fragment, too short to keep
+
+    segments = decoder.find_code_segments(pulses)
+
+    assert [list(s) for s in segments] == [encode_segment(5592405), encode_segment(1398101)]
+
+
+# --- Test capture_segments ---
+
+def test_capture_segments_splits_while_polling():
+    """Test that the polling capture splits segments on sync gaps as edges arrive"""
+    decoder = CustomRFDecoder(gpio_pin=27, rt_priority=None)
+    pulses, _ = capture(5592405, 1398101)
+    pulses.extend([SHORT_US] * 10 + [SYNC_US])  # fragment between gaps, dropped
+    pulses.extend(encode_segment(2796202) + [SYNC_US])
+
+    # Fake clock advancing 1µs per read, with the pin toggling at each edge
+    edges = []
+    t = 0
+    for pulse_us in pulses:
+        t += pulse_us * 1000
+        edges.append(t)
+    clock = {'ns': 0}
+
+    def monotonic_ns():
+        clock['ns'] += 1000
+        return clock['ns']
+
+    def gpio_input(pin):
+        return bisect_right(edges, clock['ns']) % 2
+
+    with patch.object(decoder, 'setup'), \
+         patch('RFController.custom_rf_decoder.time.monotonic_ns', monotonic_ns), \
+         patch('RFController.custom_rf_decoder.GPIO', MagicMock(input=gpio_input)):
+        segments, sync_gaps, transitions = decoder.capture_segments(duration=t / 1e9 + 0.001)
+
+    assert [len(s) for s in segments] == [48, 48, 48]
+    assert sync_gaps == 5
+    assert transitions == len(pulses)
+    assert [decoder.decode_segment(s)['code'] for s in segments] == [5592405, 1398101, 2796202]
+
+
+def test_capture_edges_cancels_callback_when_interrupted():
+    """Test that the pigpio callback is cancelled even if the capture is interrupted"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    decoder._pi = MagicMock()
+
+    with patch('RFController.custom_rf_decoder.pigpio'), \
+         patch('RFController.custom_rf_decoder.time.sleep', side_effect=KeyboardInterrupt):
+        with pytest.raises(KeyboardInterrupt):
+            decoder._capture_edges(2.0)
+
+    decoder._pi.callback.return_value.cancel.assert_called_once()
+
+
+def test_capture_segments_live_with_pigpio():
+    """Test that pigpio edges are segmented and handed off during the window"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    pulses, _ = capture(5592405, 1398101)
+    ticks = [0]
+    for pulse_us in pulses:
+        ticks.append(ticks[-1] + pulse_us)
+
+    def register(gpio, edge, func):
+        for tick in ticks:
+            func(gpio, 0, tick)
+        return MagicMock()
+
+    decoder._pi = MagicMock()
+    decoder._pi.callback.side_effect = register
+    decoder._setup_done = True
+    seen = []
+
+    with patch('RFController.custom_rf_decoder.pigpio') as mock_pigpio:
+        mock_pigpio.tickDiff.side_effect = lambda t1, t2: t2 - t1
+        segments, sync_gaps, transitions = decoder.capture_segments(
+            duration=0.05, on_segment=lambda s: seen.append(decoder.decode_segment(s)['code'])
+        )
+
+    assert seen == [5592405, 1398101]
+    assert len(segments) == 2
+    assert sync_gaps == 3
+    assert transitions == len(pulses)
+
+
+def test_capture_segments_live_drains_queued_edges_at_deadline():
+    """Test that edges still queued when the window closes are processed, not dropped"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    pulses, _ = capture(5592405, 1398101)
+    ticks = [0]
+    for pulse_us in pulses:
+        ticks.append(ticks[-1] + pulse_us)
+    cb = MagicMock()
+
+    def register(gpio, edge, func):
+        for tick in ticks:
+            func(gpio, 0, tick)
+        return cb
+
+    decoder._pi = MagicMock()
+    decoder._pi.callback.side_effect = register
+    decoder._setup_done = True
+
+    with patch('RFController.custom_rf_decoder.pigpio') as mock_pigpio:
+        mock_pigpio.tickDiff.side_effect = lambda t1, t2: t2 - t1
+        segments, sync_gaps, transitions = decoder.capture_segments(duration=0)
+
+    assert [decoder.decode_segment(s)['code'] for s in segments] == [5592405, 1398101]
+    assert transitions == len(pulses)
+    cb.cancel.assert_called_once()
+
+
+def test_capture_segments_live_stops_when_callback_returns_true():
+    """Test that the pigpio capture ends as soon as on_segment asks it to"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    pulses, _ = capture(5592405, 1398101, 2796202)
+    ticks = [0]
+    for pulse_us in pulses:
+        ticks.append(ticks[-1] + pulse_us)
+
+    def register(gpio, edge, func):
+        for tick in ticks:
+            func(gpio, 0, tick)
+        return MagicMock()
+
+    decoder._pi = MagicMock()
+    decoder._pi.callback.side_effect = register
+    decoder._setup_done = True
+    seen = []
+
+    def on_segment(segment):
+        seen.append(segment)
+        return True
+
+    with patch('RFController.custom_rf_decoder.pigpio') as mock_pigpio:
+        mock_pigpio.tickDiff.side_effect = lambda t1, t2: t2 - t1
+        segments, sync_gaps, _ = decoder.capture_segments(duration=5.0, on_segment=on_segment)
+
+    assert len(seen) == 1
+    assert len(segments) == 1
+    assert sync_gaps == 2
+
+
+def test_capture_segments_with_edge_events():
+    """Test that the events backend builds pulses from callback timestamps"""
+    decoder = CustomRFDecoder(gpio_pin=27, backend="events")
+    pulses, _ = capture(5592405, 1398101)
+    stamps = [0]
+    for pulse_us in pulses:
+        stamps.append(stamps[-1] + pulse_us * 1000)
+    clock = iter(stamps)
+
+    gpio = MagicMock()
+    gpio.input.return_value = 1
+    gpio.add_event_detect.side_effect = lambda pin, edge, callback: [callback(pin) for _ in stamps]
+
+    with patch.object(decoder, 'setup'), \
+         patch('RFController.custom_rf_decoder.GPIO', gpio), \
+         patch('RFController.custom_rf_decoder.time.monotonic_ns', lambda: next(clock)), \
+         patch('RFController.custom_rf_decoder.time.sleep'):
+        segments, sync_gaps, transitions = decoder.capture_segments(duration=2.0)
+
+    gpio.remove_event_detect.assert_called_once_with(27)
+    assert [decoder.decode_segment(s)['code'] for s in segments] == [5592405, 1398101]
+    assert sync_gaps == 3
+    assert transitions == len(pulses)
+
+
+def test_pigpio_backend_requires_daemon():
+    """Test that the pigpio backend fails instead of silently polling"""
+    decoder = CustomRFDecoder(gpio_pin=27, backend="pigpio")
+
+    with patch('RFController.custom_rf_decoder.pigpio') as mock_pigpio:
+        mock_pigpio.pi.return_value.connected = False
+        with pytest.raises(RuntimeError):
+            decoder.setup()
+
+
+def test_poll_backend_skips_pigpio():
+    """Test that the poll backend never connects to the pigpio daemon"""
+    decoder = CustomRFDecoder(gpio_pin=27, backend="poll")
+
+    with patch('RFController.custom_rf_decoder.pigpio') as mock_pigpio, \
+         patch('RFController.custom_rf_decoder._import_gpio'), \
+         patch('RFController.custom_rf_decoder.GPIO'):
+        decoder.setup()
+
+    mock_pigpio.pi.assert_not_called()
+    assert decoder._pi is None
+
+
+def test_unknown_backend_rejected():
+    """Test that an unknown capture backend is rejected up front"""
+    with pytest.raises(ValueError):
+        CustomRFDecoder(gpio_pin=27, backend="spi")
+
+
+def test_realtime_priority_without_permission():
+    """Test that capture still runs, and affinity is restored, without CAP_SYS_NICE"""
+    affinity = os.sched_getaffinity(0)
+
+    with patch('os.sched_setscheduler', side_effect=PermissionError), \
+         patch('RFController.custom_rf_decoder._lock_memory'):
+        with _realtime_priority():
+            assert os.sched_getaffinity(0) == {max(affinity)}
+
+    assert os.sched_getaffinity(0) == affinity
+
+
+def test_realtime_priority_disabled():
+    """Test that rt_priority=None leaves scheduling untouched"""
+    with patch('os.sched_setaffinity') as mock_affinity, \
+         patch('os.sched_setscheduler') as mock_scheduler, \
+         patch('RFController.custom_rf_decoder._lock_memory') as mock_lock:
+        with _realtime_priority(None):
+            pass
+
+    mock_affinity.assert_not_called()
+    mock_scheduler.assert_not_called()
+    mock_lock.assert_not_called()
+
+
+def test_realtime_priority_unlocks_memory_afterwards():
+    """Test that memory is only locked while the block runs, and is opt-in"""
+    with patch('os.sched_setscheduler'), \
+         patch('os.sched_setaffinity'), \
+         patch('RFController.custom_rf_decoder._lock_memory', return_value=True) as mock_lock, \
+         patch('RFController.custom_rf_decoder._unlock_memory') as mock_unlock:
+        with _realtime_priority(50):
+            mock_unlock.assert_not_called()
+        with _realtime_priority(50):
+            pass
+
+    assert mock_lock.call_count == 2
+    assert mock_unlock.call_count == 2
+    assert CustomRFDecoder(gpio_pin=27).rt_priority is None
+
+
+# --- Test capture_single_window ---
+
+def test_capture_single_window_picks_majority_code():
+    """Test that the dominant code wins over an outlier"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    fake = fake_capture_segments(5592405, 5592405, 1398101, 5592405)
+
+    with patch.object(decoder, 'setup'), \
+         patch.object(decoder, 'capture_segments', side_effect=fake):
+        result = decoder.capture_single_window(duration=2.0)
+
+    assert result['code'] == 5592405
+    assert result['times_seen'] == 3
+    assert result['segments_found'] == 4
+    assert result['total_codes_found'] == 2
+    assert result['confidence'] == 0.75
+
+
+def test_capture_single_window_measures_each_segment():
+    """Test that segments with different widths in one window each decode with their own"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    jittered = encode_segment(5592405)
+    jittered[24] = 140  # a clipped short pulse: short for this segment's widths, not the first's
+    segments = [array('i', encode_segment(5592405, short_us=240, long_us=560))]
+    segments += [array('i', jittered) for _ in range(3)]
+
+    def fake(duration=2.0, on_segment=None):
+        for segment in segments:
+            on_segment(segment)
+        return segments, len(segments) + 1, 200
+
+    with patch.object(decoder, 'setup'), \
+         patch.object(decoder, 'capture_segments', side_effect=fake):
+        result = decoder.capture_single_window(duration=2.0)
+
+    assert result['code'] == 5592405
+    assert result['times_seen'] == 4
+    assert result['total_codes_found'] == 1
+
+
+def test_capture_single_window_no_signal():
+    """Test that an empty capture raises NO_SIGNAL"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+
+    with patch.object(decoder, 'setup'), \
+         patch.object(decoder, 'capture_segments', return_value=([], 0, 0)):
+        with pytest.raises(RFDecodeError) as exc_info:
+            decoder.capture_single_window(duration=2.0)
+
+    assert exc_info.value.error_type == "NO_SIGNAL"
+
+
+def test_capture_single_window_ambiguous():
+    """Test that a capture without a dominant code raises AMBIGUOUS_SIGNAL"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    fake = fake_capture_segments(5592405, 1398101, 5592405, 1398101, 2796202)
+
+    with patch.object(decoder, 'setup'), \
+         patch.object(decoder, 'capture_segments', side_effect=fake):
+        with pytest.raises(RFDecodeError) as exc_info:
+            decoder.capture_single_window(duration=2.0, min_segments=2)
+
+    assert exc_info.value.error_type == "AMBIGUOUS_SIGNAL"
+    assert exc_info.value.details["unique_codes"] == 3
+
+
+# --- Test receive ---
+
+def test_receive_retries_after_decode_error():
+    """Test that receive keeps listening after a failed window"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    no_signal = RFDecodeError("NO_SIGNAL", "No RF signal detected.")
+    good = {'code': 5592405}
+
+    with patch.object(decoder, 'setup'), \
+         patch.object(decoder, 'wait_for_edge', return_value=True), \
+         patch.object(decoder, 'capture_single_window', side_effect=[no_signal, good]):
+        assert decoder.receive(timeout=5) == good
+
+
+def test_receive_times_out_without_activity():
+    """Test that receive returns None when no edge arrives"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+
+    with patch.object(decoder, 'setup'), \
+         patch.object(decoder, 'wait_for_edge', return_value=False), \
+         patch.object(decoder, 'capture_single_window') as mock_capture:
+        assert decoder.receive(timeout=5) is None
+        mock_capture.assert_not_called()
+
+
+def test_receive_single_capture_with_pigpio():
+    """Test that receive uses one early-exit capture spanning the timeout with pigpio"""
+    decoder = CustomRFDecoder(gpio_pin=27)
+    decoder._pi = MagicMock()
+    decoder._setup_done = True
+    good = {'code': 5592405}
+
+    with patch.object(decoder, 'capture_single_window', return_value=good) as mock_capture:
+        assert decoder.receive(timeout=30) == good
+
+    mock_capture.assert_called_once_with(duration=30, early_exit=True)
@@ -0,0 +1,87 @@
+import sys
+import os
+from unittest.mock import MagicMock, patch
+
+# Add RFController to path for relative imports within that module
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src/RFController')))
+
+# Add src to path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from RFController import wave_tx
+from RFController.wave_tx import WaveTransmitter
+
+
+def make_transmitter():
+    """Build a transmitter on GPIO 17 backed by a mock pigpio connection"""
+    pi = MagicMock()
+    pi.wave_create.side_effect = range(100)
+    pi.wave_tx_busy.return_value = 0
+    with patch.object(wave_tx, 'pigpio'):
+        return WaveTransmitter(17, pi)
+
+
+def test_frame_pulses_protocol_1():
+    """Test that a frame is 24 bits followed by the sync pulse, as rpi_rf sends it"""
+    tx = make_transmitter()
+
+    frame = tx.frame_pulses(0b101, 1, 189)
+
+    assert len(frame) == 25
+    assert frame[0] == (189, 3 * 189)  # bit 0
+    assert frame[-2] == (3 * 189, 189)  # bit 1
+    assert frame[-1] == (189, 31 * 189)  # sync
+
+
+def test_tx_code_reuses_waveform():
+    """Test that sending the same code again replays the cached waveform"""
+    tx = make_transmitter()
+
+    with patch.object(wave_tx, 'pigpio'):
+        assert tx.tx_code(5592405, 1, 189)
+        assert tx.tx_code(5592405, 1, 189)
+        assert tx.tx_code(5592404, 1, 189)
+
+    assert tx.pi.wave_create.call_count == 2
+    assert [c.args[0] for c in tx.pi.wave_send_once.call_args_list] == [0, 0, 1]
+
+
+def test_tx_code_evicts_oldest_waveform():
+    """Test that the waveform cache stays within the daemon's limits"""
+    tx = make_transmitter()
+
+    with patch.object(wave_tx, 'pigpio'):
+        for code in range(wave_tx.MAX_CACHED_WAVES + 1):
+            tx.tx_code(code, 1, 189)
+
+    tx.pi.wave_delete.assert_called_once_with(0)
+
+
+def test_tx_code_unknown_protocol():
+    """Test that an unknown protocol is refused without touching the daemon"""
+    tx = make_transmitter()
+
+    assert tx.tx_code(5592405, 9, 189) is False
+    tx.pi.wave_send_once.assert_not_called()
+
+
+def test_connect_without_daemon():
+    """Test that connect returns None so callers can fall back to rpi_rf"""
+    with patch.object(wave_tx, 'pigpio') as mock_pigpio:
+        mock_pigpio.pi.return_value.connected = False
+        assert WaveTransmitter.connect(17) is None
+
+
+def test_tx_code_clears_waveforms_when_out_of_control_blocks():
+    """Test that a failed wave_create frees the cached waveforms and retries"""
+    tx = make_transmitter()
+    tx.pi.wave_create.side_effect = [0, RuntimeError("no more CBs"), 1]
+
+    with patch.object(wave_tx, 'pigpio') as mock_pigpio:
+        mock_pigpio.error = RuntimeError
+        assert tx.tx_code(5592405, 1, 189)
+        assert tx.tx_code(5592404, 1, 189)
+
+    tx.pi.wave_clear.assert_called_once()
+    assert list(tx._waves.values()) == [1]
+    assert [c.args[0] for c in tx.pi.wave_send_once.call_args_list] == [0, 1]